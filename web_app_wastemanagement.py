@@ -1,19 +1,18 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import sqlite3
+import queue
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import hashlib
+import hmac
 import secrets
 import qrcode
+from qrcode.image.svg import SvgPathImage
 from io import BytesIO
 import base64
-from PIL import Image
-import folium
-from streamlit_folium import folium_static
 from streamlit_option_menu import option_menu
 import yaml
 import json
@@ -27,7 +26,7 @@ st.set_page_config(
 )
 
 # ===================== CUSTOM CSS =====================
-st.markdown("""
+_APP_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -102,12 +101,124 @@ st.markdown("""
         font-size: 0.8rem;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# ===================== LOOKUPS =====================
+# waste_collections stores waste types as small-int ids backed by the waste_types table
+WASTE_TYPE_ID = {'wet': 1, 'dry': 2, 'hazardous': 3, 'e-waste': 4}
+
+# Declared dtypes for page queries, so pandas builds typed columns instead of inferring them row by row
+WC_DTYPES = {'id': 'int64', 'weight_kg': 'float64', 'segregated': 'bool', 'latitude': 'float64', 'longitude': 'float64'}
+
+# RGBA marker fills for the pydeck maps
+MARKER_GRAY = [128, 128, 128, 200]
+FACILITY_TYPE_RGBA = {
+    'recycling_center': [46, 139, 87, 200],
+    'composting': [30, 144, 255, 200],
+    'e_waste': [220, 20, 60, 200],
+    'wte_plant': [128, 0, 128, 200]
+}
+VEHICLE_STATUS_RGBA = {'collecting': [46, 139, 87, 200], 'idle': [30, 144, 255, 200], 'maintenance': [220, 20, 60, 200]}
+COLLECTION_STATUS_RGBA = {'scheduled': [220, 20, 60, 200], 'collected': [46, 139, 87, 200], 'processed': [30, 144, 255, 200]}
+
+# ===================== SHOP & TRAINING CATALOGUE =====================
+# Static content, built once at import instead of on every rerun
+PRODUCTS = (
+    {"name": "3-Bin Segregation Set", "price": 1500, "points": 300, "stock": 10, "category": "Equipment"},
+    {"name": "Compost Kit", "price": 2000, "points": 400, "stock": 5, "category": "Composting"},
+    {"name": "Eco Bags (Set of 5)", "price": 500, "points": 100, "stock": 20, "category": "Accessories"},
+    {"name": "Organic Fertilizer", "price": 800, "points": 160, "stock": 15, "category": "Garden"},
+    {"name": "Solar Waste Bin", "price": 5000, "points": 1000, "stock": 3, "category": "Technology"},
+    {"name": "Safety Gloves", "price": 300, "points": 60, "stock": 25, "category": "Safety"}
+)
+CATEGORIES = ("All",) + tuple(dict.fromkeys(p["category"] for p in PRODUCTS))
+PRODUCTS_BY_CAT = {c: tuple(p for p in PRODUCTS if p["category"] == c) for c in CATEGORIES[1:]}
+
+MODULES = (
+    {
+        "title": "Waste Classification & Identification",
+        "description": "Learn to identify different types of waste and their proper disposal methods",
+        "duration": "30 minutes",
+        "points": 50,
+        "difficulty": "Beginner"
+    },
+    {
+        "title": "Source Segregation Best Practices",
+        "description": "Master the techniques of segregating waste at source for maximum efficiency",
+        "duration": "45 minutes",
+        "points": 75,
+        "difficulty": "Intermediate"
+    },
+    {
+        "title": "Home Composting Workshop",
+        "description": "Convert your kitchen waste into valuable compost for your garden",
+        "duration": "60 minutes",
+        "points": 100,
+        "difficulty": "Advanced"
+    },
+    {
+        "title": "Plastic Waste Management",
+        "description": "Understanding plastic types, recycling codes, and creative reuse methods",
+        "duration": "40 minutes",
+        "points": 80,
+        "difficulty": "Intermediate"
+    }
+)
+DIFFICULTY_COLORS = {
+    "Beginner": "🟢",
+    "Intermediate": "🟡",
+    "Advanced": "🟠"
+}
+
+# ===================== SQL STATEMENTS =====================
+# Stable statement text lets sqlite3's prepared-statement cache skip re-parsing on every call
+_AUTH_COLUMNS = ('id', 'username', 'email', 'password_hash', 'full_name', 'phone', 'address',
+                 'user_type', 'ward_number', 'unique_waste_id', 'points')
+_SQL_AUTH = f"SELECT {', '.join(_AUTH_COLUMNS)} FROM users WHERE username = ?"
+
+_SQL_REGISTER_USER = '''
+    INSERT INTO users (username, email, password_hash, full_name, phone, address, ward_number, unique_waste_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_SCHEDULE_COLLECTION = '''
+    INSERT INTO waste_collections (user_id, waste_type_id, weight_kg, segregated, collection_date, latitude, longitude)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_AWARD_POINTS = "UPDATE users SET points = points + ? WHERE id = ?"
+
+# ===================== MAP MARKERS =====================
+WASTE_MARKER_COLORS = {'wet': 'green', 'dry': 'blue', 'hazardous': 'red', 'e-waste': 'orange'}
+
+# Rows are [latitude, longitude, icon color, popup text]
+WASTE_MARKER_CALLBACK = """
+function (row) {
+    var icon = L.AwesomeMarkers.icon({icon: 'trash', markerColor: row[2]});
+    return L.marker(new L.LatLng(row[0], row[1]), {icon: icon}).bindPopup(row[3]);
+}
+"""
 
 # ===================== DATABASE INITIALIZATION =====================
+DB_PATH = 'waste_management.db'
+
 @st.cache_resource
-def init_database():
-    conn = sqlite3.connect('waste_management.db', check_same_thread=False)
+def get_conn():
+    """Shared read-write connection, opened once per server process."""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    
+    # Connection settings persist for the app lifetime since the connection is cached
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-20000")
+    
+    init_schema(conn)
+    return conn
+
+def init_schema(conn):
+    """Create tables, apply one-off migrations and seed sample data on an empty database."""
     cursor = conn.cursor()
     
     # Create tables
@@ -116,7 +227,7 @@ def init_database():
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             username TEXT UNIQUE NOT NULL,
             email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
+            password_hash BLOB NOT NULL,
             full_name TEXT,
             phone TEXT,
             address TEXT,
@@ -129,12 +240,28 @@ def init_database():
         )
     ''')
     
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS waste_types (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL
+        )
+    ''')
+    cursor.executemany("INSERT OR IGNORE INTO waste_types (id, name) VALUES (?, ?)",
+                       [(type_id, name) for name, type_id in WASTE_TYPE_ID.items()])
+    
+    # Older databases kept waste_type as free text; set that table aside and rebuild it on waste_type_id
+    # (a table rebuild rather than ALTER TABLE ... DROP COLUMN, which needs SQLite 3.35+)
+    cursor.execute("PRAGMA table_info(waste_collections)")
+    legacy_waste_type = 'waste_type' in [column[1] for column in cursor.fetchall()]
+    if legacy_waste_type:
+        cursor.execute("ALTER TABLE waste_collections RENAME TO waste_collections_legacy")
+    
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS waste_collections (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER,
             collection_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-            waste_type TEXT,
+            waste_type_id INTEGER,
             weight_kg REAL,
             segregated INTEGER DEFAULT 0,
             collected_by TEXT,
@@ -142,10 +269,22 @@ def init_database():
             status TEXT DEFAULT 'scheduled',
             latitude REAL,
             longitude REAL,
-            FOREIGN KEY (user_id) REFERENCES users (id)
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (waste_type_id) REFERENCES waste_types (id)
         )
     ''')
     
+    if legacy_waste_type:
+        cursor.execute('''
+            INSERT INTO waste_collections (id, user_id, collection_date, waste_type_id, weight_kg, segregated,
+                                           collected_by, vehicle_number, status, latitude, longitude)
+            SELECT l.id, l.user_id, l.collection_date, wt.id, l.weight_kg, l.segregated,
+                   l.collected_by, l.vehicle_number, l.status, l.latitude, l.longitude
+            FROM waste_collections_legacy l
+            LEFT JOIN waste_types wt ON wt.name = l.waste_type
+        ''')
+        cursor.execute("DROP TABLE waste_collections_legacy")
+    
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS complaints (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -203,156 +342,429 @@ def init_database():
         )
     ''')
     
+    # Single-row dashboard counters, kept current by the triggers below; weight is whole grams so the sums stay exact
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mv_dashboard_stats (
+            total_users INTEGER,
+            total_waste_g INTEGER,
+            active_complaints INTEGER,
+            facilities INTEGER
+        )
+    ''')
+    
+    cursor.execute('''
+        INSERT INTO mv_dashboard_stats (total_users, total_waste_g, active_complaints, facilities)
+        SELECT
+            (SELECT COUNT(*) FROM users),
+            (SELECT COALESCE(SUM(CAST(ROUND(weight_kg * 1000) AS INTEGER)), 0) FROM waste_collections),
+            (SELECT COUNT(*) FROM complaints WHERE status = 'pending'),
+            (SELECT COUNT(*) FROM facilities)
+        WHERE NOT EXISTS (SELECT 1 FROM mv_dashboard_stats)
+    ''')
+    
+    dashboard_triggers = {
+        'tr_users_ins': "AFTER INSERT ON users BEGIN UPDATE mv_dashboard_stats SET total_users = total_users + 1; END",
+        'tr_users_del': "AFTER DELETE ON users BEGIN UPDATE mv_dashboard_stats SET total_users = total_users - 1; END",
+        'tr_wc_ins': "AFTER INSERT ON waste_collections BEGIN UPDATE mv_dashboard_stats SET total_waste_g = total_waste_g + CAST(ROUND(COALESCE(NEW.weight_kg, 0) * 1000) AS INTEGER); END",
+        'tr_wc_del': "AFTER DELETE ON waste_collections BEGIN UPDATE mv_dashboard_stats SET total_waste_g = total_waste_g - CAST(ROUND(COALESCE(OLD.weight_kg, 0) * 1000) AS INTEGER); END",
+        'tr_wc_upd': "AFTER UPDATE OF weight_kg ON waste_collections BEGIN UPDATE mv_dashboard_stats SET total_waste_g = total_waste_g + CAST(ROUND(COALESCE(NEW.weight_kg, 0) * 1000) AS INTEGER) - CAST(ROUND(COALESCE(OLD.weight_kg, 0) * 1000) AS INTEGER); END",
+        'tr_complaints_ins': "AFTER INSERT ON complaints BEGIN UPDATE mv_dashboard_stats SET active_complaints = active_complaints + (NEW.status = 'pending'); END",
+        'tr_complaints_del': "AFTER DELETE ON complaints BEGIN UPDATE mv_dashboard_stats SET active_complaints = active_complaints - (OLD.status = 'pending'); END",
+        'tr_complaints_upd': "AFTER UPDATE OF status ON complaints BEGIN UPDATE mv_dashboard_stats SET active_complaints = active_complaints + (NEW.status = 'pending') - (OLD.status = 'pending'); END",
+        'tr_facilities_ins': "AFTER INSERT ON facilities BEGIN UPDATE mv_dashboard_stats SET facilities = facilities + 1; END",
+        'tr_facilities_del': "AFTER DELETE ON facilities BEGIN UPDATE mv_dashboard_stats SET facilities = facilities - 1; END",
+    }
+    for name, body in dashboard_triggers.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    
+    # Migrate legacy hex-encoded password hashes to raw 32-byte digests
+    cursor.execute("SELECT id, password_hash FROM users WHERE typeof(password_hash) = 'text'")
+    legacy_hashes = cursor.fetchall()
+    if legacy_hashes:
+        cursor.executemany("UPDATE users SET password_hash = ? WHERE id = ?",
+                           [(bytes.fromhex(password_hash), user_id) for user_id, password_hash in legacy_hashes])
+    
+    # Older seeds stored numpy ints as 8-byte blobs; normalise them to 0/1 integers
+    cursor.execute("UPDATE waste_collections SET segregated = (segregated != zeroblob(length(segregated))) WHERE typeof(segregated) = 'blob'")
+    
     # Insert sample data if tables are empty
     cursor.execute("SELECT COUNT(*) FROM users")
     if cursor.fetchone()[0] == 0:
-        # Insert sample admin user
-        admin_password = hashlib.sha256("admin123".encode()).hexdigest()
-        cursor.execute('''
-            INSERT INTO users (username, email, password_hash, full_name, phone, address, user_type, ward_number, unique_waste_id, points)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', ('admin', 'admin@waste.com', admin_password, 'System Administrator', '9999999999', 'Admin Office', 'admin', 'ADMIN', 'ADMIN001', 1000))
-        
-        # Insert sample citizens
-        for i in range(1, 11):
-            user_id = f"WG2024{i:04d}"
-            password = hashlib.sha256(f"user{i}123".encode()).hexdigest()
-            cursor.execute('''
-                INSERT INTO users (username, email, password_hash, full_name, phone, address, user_type, ward_number, unique_waste_id, points)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (f'user{i}', f'user{i}@example.com', password, f'User {i}', f'98765{i:05d}', f'Address {i}', 'citizen', f'Ward {i%5+1}', user_id, np.random.randint(50, 500)))
+        # Build every seed row up front so each table is filled with a single executemany
+        rng = np.random.default_rng()
+        admin_password = hash_password("admin123")
+        user_passwords = [hash_password(f"user{i}123") for i in range(1, 11)]
+        user_points = rng.integers(50, 500, 10)
+        users_data = [('admin', 'admin@waste.com', admin_password, 'System Administrator', '9999999999', 'Admin Office', 'admin', 'ADMIN', 'ADMIN001', 1000)]
+        users_data += [
+            (f'user{i}', f'user{i}@example.com', password, f'User {i}', f'98765{i:05d}', f'Address {i}', 'citizen', f'Ward {i%5+1}', f"WG2024{i:04d}", points)
+            for i, password, points in zip(range(1, 11), user_passwords, user_points.tolist())
+        ]
         
-        # Insert sample waste collections
-        for i in range(1, 51):
-            cursor.execute('''
-                INSERT INTO waste_collections (user_id, waste_type, weight_kg, segregated, status, latitude, longitude)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                np.random.randint(2, 11), 
-                np.random.choice(['wet', 'dry', 'hazardous', 'e-waste']),
-                round(np.random.uniform(1.0, 20.0), 2),
-                np.random.choice([0, 1]),
-                np.random.choice(['scheduled', 'collected', 'processed']),
-                28.6139 + np.random.uniform(-0.1, 0.1),
-                77.2090 + np.random.uniform(-0.1, 0.1)
-            ))
+        # Sample waste collections, one vectorized draw per column
+        n_collections = 50
+        user_ids = rng.integers(2, 11, n_collections)
+        waste_type_ids = rng.choice(list(WASTE_TYPE_ID.values()), n_collections)
+        weights = np.round(rng.uniform(1.0, 20.0, n_collections), 2)
+        segregated = rng.choice([0, 1], n_collections)
+        statuses = rng.choice(['scheduled', 'collected', 'processed'], n_collections)
+        lats = 28.6139 + rng.uniform(-0.1, 0.1, n_collections)
+        lons = 77.2090 + rng.uniform(-0.1, 0.1, n_collections)
+        collections_data = list(zip(
+            user_ids.tolist(), waste_type_ids.tolist(), weights.tolist(), segregated.tolist(),
+            statuses.tolist(), lats.tolist(), lons.tolist()
+        ))
         
-        # Insert sample facilities
+        # Sample facilities
         facilities_data = [
             ('Green Recycling Center', 'recycling_center', 'Sector 21, Delhi', 28.6139, 77.2090, 50.0, '011-12345678', '9 AM - 6 PM'),
             ('Compost Processing Plant', 'composting', 'Sector 15, Delhi', 28.6239, 77.2190, 30.0, '011-87654321', '24/7'),
             ('E-Waste Collection Point', 'e_waste', 'Sector 18, Delhi', 28.6039, 77.1990, 10.0, '011-11223344', '10 AM - 5 PM')
         ]
         
-        for facility in facilities_data:
-            cursor.execute('''
-                INSERT INTO facilities (name, facility_type, address, latitude, longitude, capacity_tpd, contact_number, operational_hours)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', facility)
-        
-        # Insert sample vehicles
+        # Sample vehicles
         vehicles_data = [
             ('DL01AB1234', 'garbage_truck', 5.0, 28.6139, 77.2090, 'Driver A', '9876543210', 'collecting'),
             ('DL01CD5678', 'garbage_truck', 7.0, 28.6239, 77.2190, 'Driver B', '9876543211', 'idle'),
             ('DL01EF9012', 'recycling_truck', 3.0, 28.6339, 77.2290, 'Driver C', '9876543212', 'collecting')
         ]
         
-        for vehicle in vehicles_data:
-            cursor.execute('''
+        # The whole seed commits as one transaction
+        with conn:
+            cursor.executemany('''
+                INSERT INTO users (username, email, password_hash, full_name, phone, address, user_type, ward_number, unique_waste_id, points)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', users_data)
+            
+            cursor.executemany('''
+                INSERT INTO waste_collections (user_id, waste_type_id, weight_kg, segregated, status, latitude, longitude)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', collections_data)
+            
+            cursor.executemany('''
+                INSERT INTO facilities (name, facility_type, address, latitude, longitude, capacity_tpd, contact_number, operational_hours)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', facilities_data)
+            
+            cursor.executemany('''
                 INSERT INTO vehicles (vehicle_number, vehicle_type, capacity_tons, current_latitude, current_longitude, driver_name, driver_phone, status)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', vehicle)
+            ''', vehicles_data)
+    
+    # Indexes for the hot filter/join columns
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_wc_user_date ON waste_collections(user_id, collection_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_wc_status ON waste_collections(status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_wc_collection_date ON waste_collections(collection_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_complaints_status ON complaints(status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_complaints_user_date ON complaints(user_id, created_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vehicles_status ON vehicles(status)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_type_ward ON users(user_type, ward_number)")
     
     conn.commit()
-    return conn
+
+class SQLitePool:
+    """A queue of read-only connections; writes go through the shared get_conn() connection."""
+    
+    def __init__(self, path=DB_PATH, n=4):
+        self._ro = queue.Queue()
+        for _ in range(n):
+            self._ro.put(sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False))
+    
+    @contextmanager
+    def get_read(self):
+        """Borrow a read-only connection; blocks until one is free."""
+        conn = self._ro.get()
+        try:
+            yield conn
+        finally:
+            self._ro.put(conn)
+
+@st.cache_resource
+def get_pool():
+    # get_conn() runs first so the schema exists before read-only connections open
+    get_conn()
+    return SQLitePool()
 
 # ===================== AUTHENTICATION =====================
-def authenticate_user(username, password):
-    conn = init_database()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-    user = cursor.fetchone()
-    if user and verify_password(password, user[3]):
-        return {
-            'id': user[0], 'username': user[1], 'email': user[2],
-            'full_name': user[4], 'phone': user[5], 'address': user[6],
-            'user_type': user[7], 'ward_number': user[8],
-            'unique_waste_id': user[9],
-            'points': user[12]   # ✅ fixed index for points column
-        }
+def authenticate_user(pool, username, password):
+    with pool.get_read() as conn:
+        row = conn.execute(_SQL_AUTH, (username,)).fetchone()
+    if row is None:
+        return None
+    user = dict(zip(_AUTH_COLUMNS, row))
+    if verify_password(password, user.pop('password_hash')):
+        return user
     return None
 
+def hash_password(password):
+    """Hash a password to its raw SHA-256 digest (32 bytes)."""
+    return hashlib.sha256(password.encode()).digest()
+
 def verify_password(password, password_hash):
-    """Verify a password against its hash (SHA-256)."""
-    return hashlib.sha256(password.encode()).hexdigest() == password_hash
+    """Verify a password against its hash (SHA-256) in constant time."""
+    return hmac.compare_digest(hash_password(password), password_hash)
 
 # ===================== UTILITY FUNCTIONS =====================
-@st.cache_data(ttl=300)
-def get_dashboard_stats():
-    conn = init_database()
-    
-    # Total users
-    total_users = pd.read_sql("SELECT COUNT(*) as count FROM users", conn)['count'].iloc[0]
-    
-    # Total waste collected
-    total_waste = pd.read_sql("SELECT SUM(weight_kg) as total FROM waste_collections", conn)['total'].iloc[0] or 0
-    
-    # Active complaints
-    active_complaints = pd.read_sql("SELECT COUNT(*) as count FROM complaints WHERE status = 'pending'", conn)['count'].iloc[0]
-    
-    # Facilities count
-    facilities_count = pd.read_sql("SELECT COUNT(*) as count FROM facilities", conn)['count'].iloc[0]
+def get_dashboard_stats(pool):
+    # Counters are maintained by triggers on write, so this is a live single-row read
+    with pool.get_read() as conn:
+        total_users, total_waste_g, active_complaints, facilities_count = conn.execute(
+            "SELECT total_users, total_waste_g, active_complaints, facilities FROM mv_dashboard_stats"
+        ).fetchone()
     
     return {
         'total_users': total_users,
-        'total_waste_collected': round(total_waste, 2),
+        'total_waste_collected': round(total_waste_g / 1000, 2),
         'active_complaints': active_complaints,
         'facilities': facilities_count
     }
 
-@st.cache_data(ttl=300)
-def get_waste_data():
-    conn = init_database()
-    return pd.read_sql('''
-        SELECT wc.*, u.full_name, u.ward_number 
-        FROM waste_collections wc 
-        JOIN users u ON wc.user_id = u.id
-    ''', conn)
+@st.cache_data(ttl=300, hash_funcs={SQLitePool: id})
+def get_waste_data(pool):
+    with pool.get_read() as conn:
+        df = pd.read_sql_query('''
+            SELECT wc.id, wc.user_id, wc.collection_date, wt.name AS waste_type, wc.weight_kg,
+                   CAST(wc.segregated AS INTEGER) AS segregated,
+                   wc.collected_by, wc.vehicle_number, wc.status, wc.latitude, wc.longitude,
+                   u.full_name, u.ward_number
+            FROM waste_collections wc 
+            JOIN users u ON wc.user_id = u.id
+            LEFT JOIN waste_types wt ON wt.id = wc.waste_type_id
+        ''', conn, dtype_backend='pyarrow')
+    
+    # Low-cardinality labels as categoricals: groupby/value_counts work on int codes
+    for col in ('waste_type', 'status', 'ward_number'):
+        df[col] = df[col].astype('category')
+    # Parsed once here so callers can bucket by day with a numpy cast instead of .dt.date
+    df['collection_date'] = pd.to_datetime(df['collection_date'], format='ISO8601').astype('datetime64[ns]')
+    # Narrow 0/1 copy for colour scales and rates, so render paths don't cast per call
+    df['segregated_i8'] = df['segregated'].to_numpy(dtype=np.int8, na_value=0)
+    return df
 
-@st.cache_data(ttl=300)
-def get_facilities_data():
-    conn = init_database()
-    return pd.read_sql("SELECT * FROM facilities", conn)
+@st.cache_data(ttl=300, hash_funcs={SQLitePool: id})
+def get_facilities_data(pool):
+    with pool.get_read() as conn:
+        return pd.read_sql_query("SELECT * FROM facilities", conn, dtype_backend='pyarrow')
 
-def generate_qr_code(data):
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
-    qr.add_data(data)
-    qr.make(fit=True)
+@st.cache_data(ttl=300, hash_funcs={SQLitePool: id})
+def get_ward_waste_agg(pool):
+    with pool.get_read() as conn:
+        return pd.read_sql_query('''
+            SELECT u.ward_number, wt.name AS waste_type, SUM(wc.weight_kg) AS weight_kg
+            FROM waste_collections wc
+            JOIN users u ON wc.user_id = u.id
+            LEFT JOIN waste_types wt ON wt.id = wc.waste_type_id
+            GROUP BY u.ward_number, wc.waste_type_id
+        ''', conn, dtype_backend='pyarrow')
+
+@st.cache_data(ttl=300, hash_funcs={SQLitePool: id})
+def get_day_hour_waste_agg(pool):
+    with pool.get_read() as conn:
+        return pd.read_sql_query('''
+            SELECT CAST(strftime('%d', collection_date) AS INTEGER) AS day,
+                   CAST(strftime('%H', collection_date) AS INTEGER) AS hour,
+                   SUM(weight_kg) AS weight_kg
+            FROM waste_collections
+            GROUP BY day, hour
+        ''', conn, dtype_backend='pyarrow')
+
+@st.cache_data(ttl=60, hash_funcs={SQLitePool: id})
+def load_users(pool, user_type=None, ward_number=None):
+    where, params = [], []
+    if user_type is not None:
+        where.append("user_type = ?")
+        params.append(user_type)
+    if ward_number is not None:
+        where.append("ward_number = ?")
+        params.append(ward_number)
+    
+    with pool.get_read() as conn:
+        return pd.read_sql_query(
+            "SELECT id, username, full_name, email, user_type, ward_number, points FROM users "
+            f"WHERE {' AND '.join(where) or '1=1'}",
+            conn, params=params, dtype_backend='pyarrow')
+
+@st.cache_data(ttl=60, hash_funcs={SQLitePool: id})
+def load_vehicles(pool):
+    with pool.get_read() as conn:
+        return pd.read_sql_query('''
+            SELECT vehicle_number, vehicle_type, capacity_tons, current_latitude, current_longitude,
+                   driver_name, driver_phone, status, last_updated
+            FROM vehicles
+        ''', conn, dtype_backend='pyarrow')
+
+def _date_bounds(start_date, end_date):
+    # Half-open range on the raw column so idx_wc_collection_date can seek
+    return start_date.isoformat(), (end_date + timedelta(days=1)).isoformat()
+
+@st.cache_data(ttl=60, hash_funcs={SQLitePool: id})
+def get_report_summary(pool, start_date, end_date):
+    with pool.get_read() as conn:
+        count, weight, seg_rate, users = conn.execute('''
+            SELECT COUNT(*), COALESCE(SUM(wc.weight_kg), 0), COALESCE(AVG(CAST(wc.segregated AS REAL)), 0),
+                   COUNT(DISTINCT wc.user_id)
+            FROM waste_collections wc 
+            JOIN users u ON wc.user_id = u.id 
+            WHERE wc.collection_date >= ? AND wc.collection_date < ?
+        ''', _date_bounds(start_date, end_date)).fetchone()
     
-    img = qr.make_image(fill_color="black", back_color="white")
+    return {
+        'collections': count,
+        'total_weight': weight,
+        'segregation_rate': seg_rate,
+        'active_users': users
+    }
+
+@st.cache_data(ttl=60, hash_funcs={SQLitePool: id})
+def load_report_window(pool, start_date, end_date):
+    params = _date_bounds(start_date, end_date)
+    with pool.get_read() as conn:
+        df = pd.read_sql_query('''
+            SELECT wc.id, wc.user_id, wc.collection_date, wt.name AS waste_type, wc.weight_kg,
+                   CAST(wc.segregated AS INTEGER) AS segregated, wc.status, u.ward_number
+            FROM waste_collections wc 
+            JOIN users u ON wc.user_id = u.id 
+            LEFT JOIN waste_types wt ON wt.id = wc.waste_type_id
+            WHERE wc.collection_date >= ? AND wc.collection_date < ?
+        ''', conn, params=params, dtype_backend='pyarrow')
+    
+    # Day bucket for the trend chart, derived once per cached window
+    df['collection_day'] = pd.to_datetime(df['collection_date'], format='ISO8601').dt.floor('D')
+    return df
+
+@st.cache_data(ttl=60, hash_funcs={SQLitePool: id})
+def load_report_rows(pool, start_date, end_date):
+    # Full rows for the Raw Data table and CSV export; the charts use load_report_window
+    with pool.get_read() as conn:
+        return pd.read_sql_query('''
+            SELECT wc.id, wc.user_id, wc.collection_date, wt.name AS waste_type, wc.weight_kg, wc.segregated,
+                   wc.collected_by, wc.vehicle_number, wc.status, wc.latitude, wc.longitude,
+                   u.ward_number, u.full_name
+            FROM waste_collections wc 
+            JOIN users u ON wc.user_id = u.id 
+            LEFT JOIN waste_types wt ON wt.id = wc.waste_type_id
+            WHERE wc.collection_date >= ? AND wc.collection_date < ?
+        ''', conn, params=_date_bounds(start_date, end_date))
+
+def rgba_column(labels, lookup):
+    """Map a label Series to RGBA fills in one vectorized pass; unknown labels get MARKER_GRAY."""
+    codes = labels.map({label: i for i, label in enumerate(lookup, 1)}).fillna(0).astype(int)
+    palette = np.array([MARKER_GRAY, *lookup.values()], dtype=np.uint8)
+    return palette[codes.to_numpy()].tolist()
+
+def scatter_deck(df, lat, lon, tooltip, zoom=12, radius=150, extra_layers=()):
+    """Render ``df`` as a single ScatterplotLayer; ``df`` must carry an RGBA ``color`` column."""
+    import pydeck as pdk
+    
+    layer = pdk.Layer(
+        "ScatterplotLayer",
+        data=df,
+        get_position=f'[{lon}, {lat}]',
+        get_fill_color='color',
+        get_radius=radius,
+        pickable=True
+    )
+    view = pdk.ViewState(latitude=float(df[lat].mean()), longitude=float(df[lon].mean()), zoom=zoom)
+    return pdk.Deck(layers=[*extra_layers, layer], initial_view_state=view, tooltip={"html": tooltip})
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def render_cluster_map_html(markers, center_lat, center_lon, zoom=12):
+    """Leaflet HTML for ``markers`` rows (see WASTE_MARKER_CALLBACK), cached so unchanged data skips the rebuild."""
+    import folium
+    from folium.plugins import FastMarkerCluster
+    
+    m = folium.Map(location=[center_lat, center_lon], zoom_start=zoom, prefer_canvas=True)
+    FastMarkerCluster(markers, callback=WASTE_MARKER_CALLBACK).add_to(m)
+    return folium.Figure().add_child(m).render()
+
+@st.cache_data(show_spinner=False)
+def render_collection_point_html():
+    import folium
+    
+    m = folium.Map(location=[28.6139, 77.2090], zoom_start=12)
+    folium.Marker(
+        [28.6139, 77.2090],
+        popup="Your Collection Point",
+        icon=folium.Icon(color='green', icon='home')
+    ).add_to(m)
+    return folium.Figure().add_child(m).render()
+
+@st.cache_data(show_spinner=False, max_entries=2048)
+def generate_qr_code(data):
+    """Return the QR code for ``data`` as an SVG data URI, ready for ``<img src="...">``."""
+    # A single SVG path keeps the document small and needs no PIL render or PNG deflate
+    img = qrcode.make(data, image_factory=SvgPathImage, version=1, box_size=10, border=5)
     buffer = BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
+    img.save(buffer)
+    
+    return 'data:image/svg+xml;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+# ===================== REPORT FIGURES =====================
+# Keyed on the narrow aggregate frames, so unchanged inputs skip the Plotly build
+@st.cache_data(show_spinner=False)
+def build_daily_fig(daily_collections):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(
+        go.Scattergl(x=daily_collections['collection_day'], y=daily_collections['weight_kg'], name="Weight (kg)"),
+        secondary_y=False,
+    )
+    fig.add_trace(
+        go.Scattergl(x=daily_collections['collection_day'], y=daily_collections['count'], name="Count", line=dict(dash='dash')),
+        secondary_y=True,
+    )
+    fig.update_layout(title="Daily Collection Trends")
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_ward_fig(ward_analysis):
+    import plotly.express as px
+    
+    return px.scatter(
+        ward_analysis,
+        x='weight_kg',
+        y='segregated',
+        size='id',
+        hover_data=['ward_number'],
+        title="Ward Performance: Weight vs Segregation Rate",
+        labels={'weight_kg': 'Total Weight (kg)', 'segregated': 'Segregation Rate'}
+    )
+
+@st.cache_data(show_spinner=False)
+def build_pie_fig(counts, title):
+    import plotly.express as px
     
-    return base64.b64encode(buffer.getvalue()).decode()
+    return px.pie(values=counts.values, names=counts.index, title=title)
+
+@st.cache_data(show_spinner=False)
+def build_bar_fig(counts, title):
+    import plotly.express as px
+    
+    return px.bar(x=counts.index, y=counts.values, title=title)
 
 # ===================== 3D VISUALIZATIONS =====================
 def create_3d_waste_distribution():
-    waste_data = get_waste_data()
-    ward_waste = waste_data.groupby(['ward_number', 'waste_type'])['weight_kg'].sum().reset_index()
+    import plotly.graph_objects as go
+    
+    ward_waste = get_ward_waste_agg(st.session_state.pool)
 
-    fig = go.Figure()
-    for wtype, color in zip(['wet', 'dry', 'hazardous', 'e-waste'],
-                            ['#2E8B57', '#32CD32', '#FF6347', '#FFD700']):
-        subset = ward_waste[ward_waste['waste_type'] == wtype]
-        fig.add_trace(go.Scatter3d(
-            x=subset['ward_number'],
-            y=[wtype] * len(subset),
-            z=subset['weight_kg'],
-            mode='markers',
-            marker=dict(size=6, color=color),
-            name=wtype
-        ))
+    # One trace for all waste types, coloured by category code (wet, dry, hazardous, e-waste)
+    codes = pd.Categorical(ward_waste['waste_type'], categories=list(WASTE_TYPE_ID)).codes
+    fig = go.Figure(go.Scatter3d(
+        x=ward_waste['ward_number'],
+        y=ward_waste['waste_type'],
+        z=ward_waste['weight_kg'],
+        mode='markers',
+        marker=dict(
+            size=6,
+            color=codes,
+            cmin=0,
+            cmax=len(WASTE_TYPE_ID) - 1,
+            colorscale=[[0, '#2E8B57'], [1 / 3, '#32CD32'], [2 / 3, '#FF6347'], [1, '#FFD700']]
+        )
+    ))
     fig.update_layout(
         title="3D Waste Distribution by Ward and Type",
         scene=dict(
@@ -366,7 +778,9 @@ def create_3d_waste_distribution():
 
 
 def create_3d_facility_map():
-    facilities = get_facilities_data()
+    import plotly.graph_objects as go
+    
+    facilities = get_facilities_data(st.session_state.pool)
     
     fig = go.Figure(data=go.Scatter3d(
         x=facilities['longitude'],
@@ -398,14 +812,12 @@ def create_3d_facility_map():
     return fig
 
 def create_waste_trend_surface():
-    waste_data = get_waste_data()
-    waste_data['collection_date'] = pd.to_datetime(waste_data['collection_date'])
-    waste_data['day'] = waste_data['collection_date'].dt.day
-    waste_data['hour'] = waste_data['collection_date'].dt.hour
+    import plotly.graph_objects as go
+    
+    surface_data = get_day_hour_waste_agg(st.session_state.pool)
     
     # Create pivot for surface plot
-    surface_data = waste_data.groupby(['day', 'hour'])['weight_kg'].sum().reset_index()
-    pivot_data = surface_data.pivot(index='day', columns='hour', values='weight_kg').fillna(0)
+    pivot_data = surface_data.pivot_table(index='day', columns='hour', values='weight_kg', aggfunc='sum', fill_value=0)
     
     fig = go.Figure(data=[go.Surface(z=pivot_data.values, colorscale='Viridis')])
     
@@ -423,11 +835,21 @@ def create_waste_trend_surface():
 
 # ===================== MAIN APPLICATION =====================
 def main():
+    # Streamlit drops elements a rerun does not re-emit, so the stylesheet is sent on every
+    # run; an identical delta lets the frontend keep the existing node instead of replacing it
+    st.markdown(_APP_CSS, unsafe_allow_html=True)
+    
     # Initialize session state
     if 'logged_in' not in st.session_state:
         st.session_state.logged_in = False
         st.session_state.user = None
     
+    # Bind the database handles once per session; helpers receive them instead of
+    # going through the cache_resource lookup on every call
+    if 'conn' not in st.session_state:
+        st.session_state.conn = get_conn()
+        st.session_state.pool = get_pool()
+    
     # Sidebar for navigation
     with st.sidebar:
         st.markdown("### ♻️ Waste Management")
@@ -519,7 +941,7 @@ def show_login():
             password = st.text_input("Password", type="password")
             
             if st.form_submit_button("Login", use_container_width=True):
-                user = authenticate_user(username, password)
+                user = authenticate_user(st.session_state.pool, username, password)
                 if user:
                     st.session_state.logged_in = True
                     st.session_state.user = user
@@ -535,6 +957,9 @@ def show_login():
         st.markdown("- Username: `user1` Password: `user1123`")
 
 def show_register():
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
     st.markdown('<h1 class="main-header">📝 Register</h1>', unsafe_allow_html=True)
     
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -555,76 +980,66 @@ def show_register():
             submit = st.form_submit_button("Register", use_container_width=True)
             
             if submit:
-                conn = init_database()
+                conn = st.session_state.conn
                 cursor = conn.cursor()
-                password_hash = hashlib.sha256(password.encode()).hexdigest()
+                password_hash = hash_password(password)
                 unique_waste_id = f"WG{datetime.now().year}{secrets.token_hex(4).upper()}"
                 try:
-                    cursor.execute('''
-                        INSERT INTO users (username, email, password_hash, full_name, phone, address, ward_number, unique_waste_id)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (username, email, password_hash, full_name, phone, address, ward_number, unique_waste_id))
+                    cursor.execute(_SQL_REGISTER_USER, (username, email, password_hash, full_name, phone, address, ward_number, unique_waste_id))
                     conn.commit()
+                    load_users.clear()
                     st.success("Registration successful! You can now log in.")
                 except sqlite3.IntegrityError:
                     st.error("Username or email already exists.")
         st.markdown('</div>', unsafe_allow_html=True)
     
     # FIX: Add this line to define waste_data
-    waste_data = get_waste_data()
+    waste_data = get_waste_data(st.session_state.pool)
     
     with col1:
         # Waste type distribution
-        waste_by_type = waste_data.groupby('waste_type')['weight_kg'].sum()
-        fig1 = px.pie(
-            values=waste_by_type.values,
-            names=waste_by_type.index,
-            title="Waste Distribution by Type",
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
+        waste_by_type = waste_data.groupby('waste_type', observed=True)['weight_kg'].sum()
+        fig1 = go.Figure(go.Pie(
+            values=waste_by_type.to_numpy(),
+            labels=waste_by_type.index.to_numpy(),
+            marker=dict(colors=px.colors.qualitative.Set3)
+        ))
+        fig1.update_layout(title="Waste Distribution by Type")
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         # Ward-wise waste collection
-        ward_waste = waste_data.groupby('ward_number')['weight_kg'].sum().sort_values(ascending=False)
-        fig2 = px.bar(
-            x=ward_waste.index,
-            y=ward_waste.values,
-            title="Ward-wise Waste Collection",
-            color=ward_waste.values,
-            color_continuous_scale="Viridis"
-        )
+        ward_waste = waste_data.groupby('ward_number', observed=True)['weight_kg'].sum().sort_values(ascending=False)
+        ward_totals = ward_waste.to_numpy()
+        fig2 = go.Figure(go.Bar(
+            x=ward_waste.index.to_numpy(),
+            y=ward_totals,
+            marker=dict(color=ward_totals, colorscale="Viridis", showscale=True)
+        ))
+        fig2.update_layout(title="Ward-wise Waste Collection")
         st.plotly_chart(fig2, use_container_width=True)
     
     # Time series analysis
     st.markdown("### 📈 Collection Trends")
-    waste_data['collection_date'] = pd.to_datetime(waste_data['collection_date'])
-    daily_waste = waste_data.groupby(waste_data['collection_date'].dt.date)['weight_kg'].sum().reset_index()
-    
-    fig3 = px.line(
-        daily_waste,
-        x='collection_date',
-        y='weight_kg',
-        title="Daily Waste Collection Trend",
-        markers=True
-    )
-    fig3.update_traces(line_color='#2E8B57', marker_color='#32CD32')
+    days = waste_data['collection_date'].to_numpy().astype('datetime64[D]')
+    daily_waste = waste_data.groupby(days)['weight_kg'].sum().rename_axis('collection_date').reset_index()
+    
+    fig3 = go.Figure(go.Scattergl(
+        x=daily_waste['collection_date'].to_numpy(),
+        y=daily_waste['weight_kg'].to_numpy(),
+        mode='lines+markers',
+        line=dict(color='#2E8B57'),
+        marker=dict(color='#32CD32')
+    ))
+    fig3.update_layout(title="Daily Waste Collection Trend")
     st.plotly_chart(fig3, use_container_width=True)
     
     # Segregation analysis
     col3, col4 = st.columns(2)
     
     with col3:
-        # Convert segregated values to int, handling different data types
-        def convert_segregated(x):
-            if isinstance(x, bytes):
-                return int.from_bytes(x, 'little')
-            elif isinstance(x, (int, float)):
-                return int(x)
-            else:
-                return 0
-        
-        segregation_rate = waste_data['segregated'].apply(convert_segregated).mean() * 100
+        # get_waste_data precomputes segregated_i8, so this is a single vectorized mean
+        segregation_rate = waste_data['segregated_i8'].mean() * 100
         fig4 = go.Figure(go.Indicator(
             mode="gauge+number+delta",
             value=segregation_rate,
@@ -651,13 +1066,13 @@ def show_register():
     with col4:
         # Collection status
         status_counts = waste_data['status'].value_counts()
-        fig5 = px.pie(
-            values=status_counts.values,
-            names=status_counts.index,
-            title="Collection Status Distribution",
+        fig5 = go.Figure(go.Pie(
+            values=status_counts.to_numpy(),
+            labels=status_counts.index.to_numpy(),
             hole=0.4,   # ✅ replaced px.donut
-            color_discrete_sequence=['#FF6B6B', '#4ECDC4', '#45B7D1']
-        )
+            marker=dict(colors=['#FF6B6B', '#4ECDC4', '#45B7D1'])
+        ))
+        fig5.update_layout(title="Collection Status Distribution")
         st.plotly_chart(fig5, use_container_width=True)
 
 # ===================== SCHEDULE COLLECTION =====================
@@ -673,7 +1088,7 @@ def show_schedule_collection():
             
             col1, col2 = st.columns(2)
             with col1:
-                waste_type = st.selectbox("Waste Type", ["wet", "dry", "hazardous", "e-waste"])
+                waste_type = st.selectbox("Waste Type", list(WASTE_TYPE_ID))
                 weight_kg = st.number_input("Estimated Weight (kg)", min_value=0.1, max_value=100.0, value=5.0)
             
             with col2:
@@ -689,20 +1104,20 @@ def show_schedule_collection():
                 longitude = st.number_input("Longitude", value=77.2090, format="%.6f")
             
             if st.form_submit_button("Schedule Collection", use_container_width=True):
-                conn = init_database()
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO waste_collections (user_id, waste_type, weight_kg, segregated, collection_date, latitude, longitude)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (st.session_state.user['id'], waste_type, weight_kg, int(segregated), collection_date, latitude, longitude))
-                
-                # Award points
+                conn = st.session_state.conn
                 points_earned = 10 if segregated else 5
-                cursor.execute("UPDATE users SET points = points + ? WHERE id = ?", (points_earned, st.session_state.user['id']))
+                
+                # Collection and its points award commit as one transaction
+                with conn:
+                    cursor = conn.cursor()
+                    cursor.execute(_SQL_SCHEDULE_COLLECTION, (st.session_state.user['id'], WASTE_TYPE_ID[waste_type], weight_kg, int(segregated), collection_date, latitude, longitude))
+                    cursor.execute(_SQL_AWARD_POINTS, (points_earned, st.session_state.user['id']))
                 st.session_state.user['points'] += points_earned
                 
-                conn.commit()
+                load_users.clear()
+                load_report_window.clear()
+                load_report_rows.clear()
+                get_report_summary.clear()
                 st.success(f"Collection scheduled successfully! You earned {points_earned} points!")
                 st.balloons()
         st.markdown('</div>', unsafe_allow_html=True)
@@ -717,25 +1132,21 @@ def show_schedule_collection():
     # Show location map outside of the columns and form
     st.markdown("### 📍 Your Location")
     if st.button("Show My Location on Map"):
-        m = folium.Map(location=[28.6139, 77.2090], zoom_start=12)
-        folium.Marker(
-            [28.6139, 77.2090],
-            popup="Your Collection Point",
-            icon=folium.Icon(color='green', icon='home')
-        ).add_to(m)
-        folium_static(m, width=700, height=400)
+        components.html(render_collection_point_html(), width=700, height=410)
 
 # ===================== TRACK WASTE =====================
 def show_track_waste():
     st.markdown('<h1 class="main-header">🗺️ Track Waste</h1>', unsafe_allow_html=True)
     
     # Get user's collections
-    conn = init_database()
-    user_collections = pd.read_sql('''
-        SELECT * FROM waste_collections 
-        WHERE user_id = ? 
-        ORDER BY collection_date DESC
-    ''', conn, params=[st.session_state.user['id']])
+    with st.session_state.pool.get_read() as conn:
+        user_collections = pd.read_sql_query('''
+            SELECT wc.*, wt.name AS waste_type
+            FROM waste_collections wc
+            LEFT JOIN waste_types wt ON wt.id = wc.waste_type_id
+            WHERE wc.user_id = ? 
+            ORDER BY wc.collection_date DESC
+        ''', conn, params=[st.session_state.user['id']], dtype=WC_DTYPES)
     
     if not user_collections.empty:
         # Map view
@@ -748,20 +1159,17 @@ def show_track_waste():
             center_lat = user_collections['latitude'].mean()
             center_lon = user_collections['longitude'].mean()
             
-            m = folium.Map(location=[center_lat, center_lon], zoom_start=12)
-            
-            # Add markers for each collection
-            colors = {'wet': 'green', 'dry': 'blue', 'hazardous': 'red', 'e-waste': 'orange'}
-            
-            for _, row in user_collections.iterrows():
-                color = colors.get(row['waste_type'], 'gray')
-                folium.Marker(
-                    [row['latitude'], row['longitude']],
-                    popup=f"{row['waste_type'].title()} - {row['weight_kg']}kg - {row['status']}",
-                    icon=folium.Icon(color=color, icon='trash')
-                ).add_to(m)
-            
-            folium_static(m, width=600, height=400)
+            # Add markers for each collection, rendered and clustered client-side
+            marker_data = pd.DataFrame({
+                'latitude': user_collections['latitude'],
+                'longitude': user_collections['longitude'],
+                'color': user_collections['waste_type'].map(WASTE_MARKER_COLORS).fillna('gray'),
+                'popup': (user_collections['waste_type'].str.title() + ' - '
+                          + user_collections['weight_kg'].astype(str) + 'kg - '
+                          + user_collections['status'])
+            })
+            html = render_cluster_map_html(marker_data.to_numpy().tolist(), float(center_lat), float(center_lon))
+            components.html(html, width=600, height=410)
         
         with col2:
             st.markdown("### 📊 Your Collection Stats")
@@ -776,8 +1184,9 @@ def show_track_waste():
             
             # Collection history
             st.markdown("### 📝 Recent Collections")
-            for _, collection in user_collections.head(5).iterrows():
-                status_color = {"scheduled": "🟡", "collected": "🟢", "processed": "🔵"}
+            status_color = {"scheduled": "🟡", "collected": "🟢", "processed": "🔵"}
+            recent = user_collections[['status', 'waste_type', 'weight_kg']].head(5)
+            for collection in recent.to_dict('records'):
                 st.markdown(f"{status_color.get(collection['status'], '⚫')} **{collection['waste_type'].title()}** - {collection['weight_kg']}kg")
     
     else:
@@ -815,40 +1224,41 @@ def show_complaints():
             uploaded_file = st.file_uploader("Upload Image (Optional)", type=['png', 'jpg', 'jpeg'])
             
             if st.form_submit_button("Submit Complaint", use_container_width=True):
-                conn = init_database()
-                cursor = conn.cursor()
+                conn = st.session_state.conn
                 
-                cursor.execute('''
-                    INSERT INTO complaints (user_id, complaint_type, description, location, latitude, longitude)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (st.session_state.user['id'], complaint_type, description, location, latitude, longitude))
-                
-                # Award points for reporting
-                cursor.execute("UPDATE users SET points = points + 5 WHERE id = ?", (st.session_state.user['id'],))
+                # Complaint and its points award commit as one transaction
+                with conn:
+                    cursor = conn.cursor()
+                    cursor.execute('''
+                        INSERT INTO complaints (user_id, complaint_type, description, location, latitude, longitude)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    ''', (st.session_state.user['id'], complaint_type, description, location, latitude, longitude))
+                    cursor.execute(_SQL_AWARD_POINTS, (5, st.session_state.user['id']))
                 st.session_state.user['points'] += 5
                 
-                conn.commit()
+                load_users.clear()
                 st.success("Complaint submitted successfully! You earned 5 points for reporting.")
     
     with tab2:
         # Get user complaints
-        conn = init_database()
-        user_complaints = pd.read_sql('''
-            SELECT * FROM complaints 
-            WHERE user_id = ? 
-            ORDER BY created_date DESC
-        ''', conn, params=[st.session_state.user['id']])
+        with st.session_state.pool.get_read() as conn:
+            user_complaints = pd.read_sql_query('''
+                SELECT status, complaint_type, created_date, location, description, resolved_date
+                FROM complaints 
+                WHERE user_id = ? 
+                ORDER BY created_date DESC
+            ''', conn, params=[st.session_state.user['id']])
         
         if not user_complaints.empty:
-            for _, complaint in user_complaints.iterrows():
-                status_color = {"pending": "🟡", "in_progress": "🔵", "resolved": "🟢"}
-                
-                with st.expander(f"{status_color.get(complaint['status'], '⚫')} {complaint['complaint_type']} - {complaint['created_date'][:10]}"):
-                    st.markdown(f"**Status:** {complaint['status'].title()}")
-                    st.markdown(f"**Location:** {complaint['location']}")
-                    st.markdown(f"**Description:** {complaint['description']}")
-                    if complaint['resolved_date']:
-                        st.markdown(f"**Resolved:** {complaint['resolved_date']}")
+            status_color = {"pending": "🟡", "in_progress": "🔵", "resolved": "🟢"}
+            
+            for complaint in user_complaints.itertuples(index=False, name="Complaint"):
+                with st.expander(f"{status_color.get(complaint.status, '⚫')} {complaint.complaint_type} - {complaint.created_date[:10]}"):
+                    st.markdown(f"**Status:** {complaint.status.title()}")
+                    st.markdown(f"**Location:** {complaint.location}")
+                    st.markdown(f"**Description:** {complaint.description}")
+                    if complaint.resolved_date:
+                        st.markdown(f"**Resolved:** {complaint.resolved_date}")
         else:
             st.info("No complaints filed yet.")
 
@@ -858,24 +1268,10 @@ def show_shop():
     
     st.markdown(f"**Your Points:** {st.session_state.user['points']} ⭐")
     
-    # Sample products
-    products = [
-        {"name": "3-Bin Segregation Set", "price": 1500, "points": 300, "stock": 10, "category": "Equipment"},
-        {"name": "Compost Kit", "price": 2000, "points": 400, "stock": 5, "category": "Composting"},
-        {"name": "Eco Bags (Set of 5)", "price": 500, "points": 100, "stock": 20, "category": "Accessories"},
-        {"name": "Organic Fertilizer", "price": 800, "points": 160, "stock": 15, "category": "Garden"},
-        {"name": "Solar Waste Bin", "price": 5000, "points": 1000, "stock": 3, "category": "Technology"},
-        {"name": "Safety Gloves", "price": 300, "points": 60, "stock": 25, "category": "Safety"}
-    ]
-    
     # Filter products
-    categories = ["All"] + list(set([p["category"] for p in products]))
-    selected_category = st.selectbox("Filter by Category", categories)
+    selected_category = st.selectbox("Filter by Category", CATEGORIES)
     
-    if selected_category != "All":
-        filtered_products = [p for p in products if p["category"] == selected_category]
-    else:
-        filtered_products = products
+    filtered_products = PRODUCTS_BY_CAT.get(selected_category, PRODUCTS)
     
     # Display products in grid
     cols = st.columns(3)
@@ -913,38 +1309,7 @@ def show_shop():
 def show_training():
     st.markdown('<h1 class="main-header">📚 Training Modules</h1>', unsafe_allow_html=True)
     
-    modules = [
-        {
-            "title": "Waste Classification & Identification",
-            "description": "Learn to identify different types of waste and their proper disposal methods",
-            "duration": "30 minutes",
-            "points": 50,
-            "difficulty": "Beginner"
-        },
-        {
-            "title": "Source Segregation Best Practices",
-            "description": "Master the techniques of segregating waste at source for maximum efficiency",
-            "duration": "45 minutes",
-            "points": 75,
-            "difficulty": "Intermediate"
-        },
-        {
-            "title": "Home Composting Workshop",
-            "description": "Convert your kitchen waste into valuable compost for your garden",
-            "duration": "60 minutes",
-            "points": 100,
-            "difficulty": "Advanced"
-        },
-        {
-            "title": "Plastic Waste Management",
-            "description": "Understanding plastic types, recycling codes, and creative reuse methods",
-            "duration": "40 minutes",
-            "points": 80,
-            "difficulty": "Intermediate"
-        }
-    ]
-    
-    for i, module in enumerate(modules):
+    for i, module in enumerate(MODULES):
         with st.expander(f"📖 {module['title']} - {module['difficulty']}"):
             col1, col2 = st.columns([3, 1])
             
@@ -957,29 +1322,22 @@ def show_training():
                 progress = st.progress(0)
                 
                 if st.button(f"Start Module {i+1}", key=f"start_{i}"):
-                    import time
-                    for percent in range(100):
-                        time.sleep(0.01)
-                        progress.progress(percent + 1)
+                    progress.progress(100)
                     
                     st.session_state.user['points'] += module['points']
                     st.success(f"Module completed! You earned {module['points']} points!")
                     st.balloons()
             
             with col2:
-                difficulty_colors = {
-                    "Beginner": "🟢",
-                    "Intermediate": "🟡", 
-                    "Advanced": "🟠"
-                }
-                st.markdown(f"### {difficulty_colors.get(module['difficulty'], '⚫')} {module['difficulty']}")
+                st.markdown(f"### {DIFFICULTY_COLORS.get(module['difficulty'], '⚫')} {module['difficulty']}")
 
 # ===================== ADMIN PAGES =====================
 def show_user_management():
+    import plotly.express as px
+    
     st.markdown('<h1 class="main-header">👥 User Management</h1>', unsafe_allow_html=True)
     
-    conn = init_database()
-    users_df = pd.read_sql("SELECT * FROM users", conn)
+    users_df = load_users(st.session_state.pool)
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -1009,12 +1367,16 @@ def show_user_management():
     with col2:
         ward_filter = st.selectbox("Filter by Ward", ["All"] + sorted(users_df['ward_number'].dropna().unique()))
     
-    # Apply filters
-    filtered_df = users_df.copy()
-    if user_type_filter != "All":
-        filtered_df = filtered_df[filtered_df['user_type'] == user_type_filter]
-    if ward_filter != "All":
-        filtered_df = filtered_df[filtered_df['ward_number'] == ward_filter]
+    # Apply filters in SQL; with no filter the unfiltered frame is shown as-is.
+    # st.cache_data hands back a fresh copy per call, so a second lookup would duplicate users_df
+    if user_type_filter == "All" and ward_filter == "All":
+        filtered_df = users_df
+    else:
+        filtered_df = load_users(
+            st.session_state.pool,
+            user_type=None if user_type_filter == "All" else user_type_filter,
+            ward_number=None if ward_filter == "All" else ward_filter,
+        )
     
     # Display table
     display_columns = ['username', 'full_name', 'email', 'user_type', 'ward_number', 'points']
@@ -1036,7 +1398,7 @@ def show_user_management():
 def show_facilities():
     st.markdown('<h1 class="main-header">🏭 Facility Management</h1>', unsafe_allow_html=True)
     
-    facilities_df = get_facilities_data()
+    facilities_df = get_facilities_data(st.session_state.pool)
     
     # Facility stats
     col1, col2, col3 = st.columns(3)
@@ -1070,13 +1432,13 @@ def show_facilities():
                 longitude = st.number_input("Longitude", format="%.6f")
             
             if st.form_submit_button("Add Facility"):
-                conn = init_database()
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO facilities (name, facility_type, address, latitude, longitude, capacity_tpd, contact_number, operational_hours)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (name, facility_type, address, latitude, longitude, capacity, contact, hours))
-                conn.commit()
+                conn = st.session_state.conn
+                with conn:
+                    conn.execute('''
+                        INSERT INTO facilities (name, facility_type, address, latitude, longitude, capacity_tpd, contact_number, operational_hours)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (name, facility_type, address, latitude, longitude, capacity, contact, hours))
+                get_facilities_data.clear()
                 st.success("Facility added successfully!")
                 st.rerun()
     
@@ -1084,39 +1446,24 @@ def show_facilities():
     st.markdown("### 🗺️ Facilities Map")
     
     if not facilities_df.empty:
-        # Create map
-        center_lat = facilities_df['latitude'].mean()
-        center_lon = facilities_df['longitude'].mean()
-        
-        m = folium.Map(location=[center_lat, center_lon], zoom_start=11)
-        
-        # Color mapping for facility types
-        type_colors = {
-            'recycling_center': 'green',
-            'composting': 'blue', 
-            'e_waste': 'red',
-            'wte_plant': 'purple'
-        }
-        
-        for _, facility in facilities_df.iterrows():
-            color = type_colors.get(facility['facility_type'], 'gray')
-            folium.Marker(
-                [facility['latitude'], facility['longitude']],
-                popup=f"{facility['name']}<br>Type: {facility['facility_type']}<br>Capacity: {facility['capacity_tpd']} TPD",
-                icon=folium.Icon(color=color, icon='industry', prefix='fa')
-            ).add_to(m)
-        
-        folium_static(m, width=700, height=400)
+        map_df = facilities_df[['name', 'facility_type', 'capacity_tpd', 'latitude', 'longitude']].assign(
+            color=rgba_column(facilities_df['facility_type'], FACILITY_TYPE_RGBA)
+        )
+        st.pydeck_chart(scatter_deck(
+            map_df, 'latitude', 'longitude',
+            "{name}<br>Type: {facility_type}<br>Capacity: {capacity_tpd} TPD", zoom=11
+        ))
     
     # Facilities table
     st.markdown("### 📋 Facilities Directory")
     st.dataframe(facilities_df, use_container_width=True)
 
 def show_vehicles():
+    import plotly.express as px
+    
     st.markdown('<h1 class="main-header">🚛 Vehicle Management</h1>', unsafe_allow_html=True)
     
-    conn = init_database()
-    vehicles_df = pd.read_sql("SELECT * FROM vehicles", conn)
+    vehicles_df = load_vehicles(st.session_state.pool)
     
     # Vehicle stats
     col1, col2, col3, col4 = st.columns(4)
@@ -1140,20 +1487,13 @@ def show_vehicles():
     st.markdown("### 🗺️ Live Vehicle Tracking")
     
     if not vehicles_df.empty:
-        # Create map for vehicle tracking
-        m = folium.Map(location=[28.6139, 77.2090], zoom_start=12)
-        
-        status_colors = {'collecting': 'green', 'idle': 'blue', 'maintenance': 'red'}
-        
-        for _, vehicle in vehicles_df.iterrows():
-            color = status_colors.get(vehicle['status'], 'gray')
-            folium.Marker(
-                [vehicle['current_latitude'], vehicle['current_longitude']],
-                popup=f"{vehicle['vehicle_number']}<br>Driver: {vehicle['driver_name']}<br>Status: {vehicle['status']}",
-                icon=folium.Icon(color=color, icon='truck', prefix='fa')
-            ).add_to(m)
-        
-        folium_static(m, width=700, height=400)
+        map_df = vehicles_df[['vehicle_number', 'driver_name', 'status', 'current_latitude', 'current_longitude']].assign(
+            color=rgba_column(vehicles_df['status'], VEHICLE_STATUS_RGBA)
+        )
+        st.pydeck_chart(scatter_deck(
+            map_df, 'current_latitude', 'current_longitude',
+            "{vehicle_number}<br>Driver: {driver_name}<br>Status: {status}"
+        ))
     
     # Vehicle status distribution
     col1, col2 = st.columns(2)
@@ -1182,96 +1522,46 @@ def show_reports():
     with col2:
         end_date = st.date_input("End Date", value=datetime.now().date())
     
-    # Get data for the date range
-    conn = init_database()
-    waste_data = pd.read_sql('''
-        SELECT wc.*, u.ward_number, u.full_name 
-        FROM waste_collections wc 
-        JOIN users u ON wc.user_id = u.id 
-        WHERE date(wc.collection_date) BETWEEN ? AND ?
-    ''', conn, params=[start_date, end_date])
+    # Header metrics come from one SQL aggregate; rows are only fetched when there is data
+    summary = get_report_summary(st.session_state.pool, start_date, end_date)
     
-    if not waste_data.empty:
+    if summary['collections']:
+        waste_data = load_report_window(st.session_state.pool, start_date, end_date)
+        
         # Summary metrics
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Total Collections", len(waste_data), "📦")
+            st.metric("Total Collections", summary['collections'], "📦")
         
         with col2:
-            total_weight = waste_data['weight_kg'].sum()
-            st.metric("Total Weight", f"{total_weight:.2f} kg", "⚖️")
+            st.metric("Total Weight", f"{summary['total_weight']:.2f} kg", "⚖️")
         
         with col3:
-            # Convert segregated values properly
-            def convert_segregated(x):
-                if isinstance(x, bytes):
-                    return int.from_bytes(x, 'little')
-                elif isinstance(x, (int, float)):
-                    return int(x)
-                else:
-                    return 0
-            
-            segregated_count = waste_data['segregated'].apply(convert_segregated).sum()
-            segregation_rate = (segregated_count / len(waste_data)) * 100 if len(waste_data) > 0 else 0
-            st.metric("Segregation Rate", f"{segregation_rate:.1f}%", "♻️")
+            st.metric("Segregation Rate", f"{summary['segregation_rate'] * 100:.1f}%", "♻️")
         
         with col4:
-            unique_users = waste_data['user_id'].nunique()
-            st.metric("Active Users", unique_users, "👥")
+            st.metric("Active Users", summary['active_users'], "👥")
         
         # Detailed analytics
         tab1, tab2, tab3, tab4 = st.tabs(["📈 Trends", "🗺️ Geographic", "📊 Performance", "📋 Raw Data"])
         
         with tab1:
             # Daily collection trend
-            daily_collections = waste_data.groupby(pd.to_datetime(waste_data['collection_date']).dt.date).agg({
-                'weight_kg': 'sum',
-                'id': 'count'
-            }).reset_index()
-            
-            fig1 = make_subplots(specs=[[{"secondary_y": True}]])
-            fig1.add_trace(
-                go.Scatter(x=daily_collections['collection_date'], y=daily_collections['weight_kg'], name="Weight (kg)"),
-                secondary_y=False,
+            daily_collections = waste_data.groupby('collection_day', as_index=False).agg(
+                weight_kg=('weight_kg', 'sum'),
+                count=('id', 'size')
             )
-            fig1.add_trace(
-                go.Scatter(x=daily_collections['collection_date'], y=daily_collections['id'], name="Count", line=dict(dash='dash')),
-                secondary_y=True,
-            )
-            fig1.update_layout(title="Daily Collection Trends")
-            st.plotly_chart(fig1, use_container_width=True)
+            st.plotly_chart(build_daily_fig(daily_collections), use_container_width=True)
         
         with tab2:
             # Ward-wise analysis
-            # Convert segregated values properly before aggregation
-            def convert_segregated(x):
-                if isinstance(x, bytes):
-                    return int.from_bytes(x, 'little')
-                elif isinstance(x, (int, float)):
-                    return int(x)
-                else:
-                    return 0
-            
-            waste_data_copy = waste_data.copy()
-            waste_data_copy['segregated'] = waste_data_copy['segregated'].apply(convert_segregated)
-            
-            ward_analysis = waste_data_copy.groupby('ward_number').agg({
+            ward_analysis = waste_data.groupby('ward_number').agg({
                 'weight_kg': 'sum',
                 'segregated': 'mean',
                 'id': 'count'
             }).reset_index()
-            
-            fig2 = px.scatter(
-                ward_analysis,
-                x='weight_kg',
-                y='segregated',
-                size='id',
-                hover_data=['ward_number'],
-                title="Ward Performance: Weight vs Segregation Rate",
-                labels={'weight_kg': 'Total Weight (kg)', 'segregated': 'Segregation Rate'}
-            )
-            st.plotly_chart(fig2, use_container_width=True)
+            st.plotly_chart(build_ward_fig(ward_analysis), use_container_width=True)
         
         with tab3:
             # Performance metrics
@@ -1280,21 +1570,20 @@ def show_reports():
             with col1:
                 # Waste type distribution
                 waste_type_dist = waste_data['waste_type'].value_counts()
-                fig3 = px.pie(values=waste_type_dist.values, names=waste_type_dist.index, title="Waste Type Distribution")
-                st.plotly_chart(fig3, use_container_width=True)
+                st.plotly_chart(build_pie_fig(waste_type_dist, "Waste Type Distribution"), use_container_width=True)
             
             with col2:
                 # Collection status
                 status_dist = waste_data['status'].value_counts()
-                fig4 = px.bar(x=status_dist.index, y=status_dist.values, title="Collection Status")
-                st.plotly_chart(fig4, use_container_width=True)
+                st.plotly_chart(build_bar_fig(status_dist, "Collection Status"), use_container_width=True)
         
         with tab4:
             st.markdown("### Raw Data Export")
-            st.dataframe(waste_data, use_container_width=True)
+            raw_data = load_report_rows(st.session_state.pool, start_date, end_date)
+            st.dataframe(raw_data, use_container_width=True)
             
             # Download button
-            csv = waste_data.to_csv(index=False)
+            csv = raw_data.to_csv(index=False)
             st.download_button(
                 label="📥 Download CSV",
                 data=csv,
@@ -1309,15 +1598,25 @@ def show_reports():
 def show_worker_collections():
     st.markdown('<h1 class="main-header">🗂️ Today\'s Collections</h1>', unsafe_allow_html=True)
     
+    wards = load_users(st.session_state.pool)['ward_number'].dropna().unique()
+    ward_filter = st.selectbox("Filter by Ward", ["All"] + sorted(wards))
+    
+    where, params = ["wc.collection_date >= date('now')", "wc.collection_date < date('now', '+1 day')"], []
+    if ward_filter != "All":
+        where.append("u.ward_number = ?")
+        params.append(ward_filter)
+    
     # Get today's collections
-    conn = init_database()
-    today_collections = pd.read_sql('''
-        SELECT wc.*, u.full_name, u.address, u.phone 
-        FROM waste_collections wc 
-        JOIN users u ON wc.user_id = u.id 
-        WHERE date(wc.collection_date) = date('now')
-        ORDER BY wc.collection_date
-    ''', conn)
+    with st.session_state.pool.get_read() as conn:
+        today_collections = pd.read_sql_query(f'''
+            SELECT wc.id, wc.weight_kg, wc.segregated, wc.status, wc.latitude, wc.longitude,
+                   wt.name AS waste_type, u.full_name, u.address, u.phone 
+            FROM waste_collections wc 
+            JOIN users u ON wc.user_id = u.id 
+            LEFT JOIN waste_types wt ON wt.id = wc.waste_type_id
+            WHERE {' AND '.join(where)}
+            ORDER BY wc.collection_date
+        ''', conn, params=params, dtype=WC_DTYPES)
     
     if not today_collections.empty:
         # Stats
@@ -1341,92 +1640,94 @@ def show_worker_collections():
         # Collections map
         st.markdown("### 🗺️ Collection Routes")
         
-        m = folium.Map(location=[28.6139, 77.2090], zoom_start=12)
-        
-        # Add markers for collections
-        status_colors = {'scheduled': 'red', 'collected': 'green', 'processed': 'blue'}
-        
-        for _, collection in today_collections.iterrows():
-            color = status_colors.get(collection['status'], 'gray')
-            folium.Marker(
-                [collection['latitude'], collection['longitude']],
-                popup=f"{collection['full_name']}<br>{collection['waste_type']} - {collection['weight_kg']}kg<br>Status: {collection['status']}",
-                icon=folium.Icon(color=color, icon='home')
-            ).add_to(m)
-        
-        folium_static(m, width=700, height=400)
+        map_df = today_collections[['full_name', 'waste_type', 'weight_kg', 'status', 'latitude', 'longitude']].assign(
+            color=rgba_column(today_collections['status'], COLLECTION_STATUS_RGBA)
+        )
+        st.pydeck_chart(scatter_deck(
+            map_df, 'latitude', 'longitude',
+            "{full_name}<br>{waste_type} - {weight_kg}kg<br>Status: {status}"
+        ))
         
         # Collection details
         st.markdown("### 📋 Collection Details")
         
-        for _, collection in today_collections.iterrows():
-            with st.expander(f"🏠 {collection['full_name']} - {collection['waste_type']} ({collection['status']})"):
+        for collection in today_collections.itertuples(index=False, name="Collection"):
+            with st.expander(f"🏠 {collection.full_name} - {collection.waste_type} ({collection.status})"):
                 col1, col2, col3 = st.columns(3)
                 
                 with col1:
-                    st.markdown(f"**Address:** {collection['address']}")
-                    st.markdown(f"**Phone:** {collection['phone']}")
-                    st.markdown(f"**Weight:** {collection['weight_kg']} kg")
+                    st.markdown(f"**Address:** {collection.address}")
+                    st.markdown(f"**Phone:** {collection.phone}")
+                    st.markdown(f"**Weight:** {collection.weight_kg} kg")
                 
                 with col2:
-                    st.markdown(f"**Waste Type:** {collection['waste_type']}")
-                    st.markdown(f"**Segregated:** {'Yes' if collection['segregated'] else 'No'}")
-                    st.markdown(f"**Current Status:** {collection['status']}")
+                    st.markdown(f"**Waste Type:** {collection.waste_type}")
+                    st.markdown(f"**Segregated:** {'Yes' if collection.segregated else 'No'}")
+                    st.markdown(f"**Current Status:** {collection.status}")
                 
                 with col3:
-                    if collection['status'] == 'scheduled':
+                    if collection.status == 'scheduled':
                         new_status = st.selectbox("Update Status", ["scheduled", "collected", "processed"], 
-                                                index=0, key=f"status_{collection['id']}")
-                        vehicle_number = st.text_input("Vehicle Number", key=f"vehicle_{collection['id']}")
+                                                index=0, key=f"status_{collection.id}")
+                        vehicle_number = st.text_input("Vehicle Number", key=f"vehicle_{collection.id}")
                         
-                        if st.button("Update", key=f"update_{collection['id']}"):
-                            cursor = conn.cursor()
-                            cursor.execute('''
-                                UPDATE waste_collections 
-                                SET status = ?, collected_by = ?, vehicle_number = ?
-                                WHERE id = ?
-                            ''', (new_status, st.session_state.user['full_name'], vehicle_number, collection['id']))
-                            conn.commit()
+                        if st.button("Update", key=f"update_{collection.id}"):
+                            conn = st.session_state.conn
+                            with conn:
+                                conn.execute('''
+                                    UPDATE waste_collections 
+                                    SET status = ?, collected_by = ?, vehicle_number = ?
+                                    WHERE id = ?
+                                ''', (new_status, st.session_state.user['full_name'], vehicle_number, collection.id))
+                            load_report_window.clear()
+                            load_report_rows.clear()
+                            get_report_summary.clear()
                             st.success("Collection updated!")
                             st.rerun()
     else:
         st.info("No collections scheduled for today.")
 
 def show_vehicle_tracking():
+    import pydeck as pdk
+    
     st.markdown('<h1 class="main-header">🚛 Vehicle Tracking</h1>', unsafe_allow_html=True)
     
-    conn = init_database()
-    vehicles_df = pd.read_sql("SELECT * FROM vehicles", conn)
+    # Cached table; picking another vehicle is a lookup on the frame, not a new query
+    vehicles_df = load_vehicles(st.session_state.pool).set_index('vehicle_number', drop=False)
     
     # Vehicle selector
-    selected_vehicle = st.selectbox("Select Vehicle", vehicles_df['vehicle_number'].tolist())
+    selected_vehicle = st.selectbox("Select Vehicle", vehicles_df.index.tolist())
     
     if selected_vehicle:
-        vehicle_info = vehicles_df[vehicles_df['vehicle_number'] == selected_vehicle].iloc[0]
+        vehicle_info = vehicles_df.loc[selected_vehicle]
+        lat, lon = float(vehicle_info['current_latitude']), float(vehicle_info['current_longitude'])
         
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            # Vehicle location map
-            m = folium.Map(location=[vehicle_info['current_latitude'], vehicle_info['current_longitude']], zoom_start=15)
-            
-            # Add vehicle marker
-            folium.Marker(
-                [vehicle_info['current_latitude'], vehicle_info['current_longitude']],
-                popup=f"Vehicle: {vehicle_info['vehicle_number']}<br>Driver: {vehicle_info['driver_name']}<br>Status: {vehicle_info['status']}",
-                icon=folium.Icon(color='green', icon='truck', prefix='fa')
-            ).add_to(m)
-            
             # Add route (simulated)
-            route_points = [
-                [vehicle_info['current_latitude'], vehicle_info['current_longitude']],
-                [vehicle_info['current_latitude'] + 0.01, vehicle_info['current_longitude'] + 0.01],
-                [vehicle_info['current_latitude'] + 0.02, vehicle_info['current_longitude'] - 0.01]
-            ]
-            
-            folium.PolyLine(route_points, color='blue', weight=3, opacity=0.8).add_to(m)
+            route_layer = pdk.Layer(
+                "PathLayer",
+                data=[{"path": [[lon, lat], [lon + 0.01, lat + 0.01], [lon - 0.01, lat + 0.02]]}],
+                get_path='path',
+                get_color=[0, 0, 255, 204],
+                width_min_pixels=3
+            )
             
-            folium_static(m, width=600, height=400)
+            # Vehicle location map
+            map_df = pd.DataFrame({
+                'vehicle_number': [vehicle_info['vehicle_number']],
+                'driver_name': [vehicle_info['driver_name']],
+                'status': [vehicle_info['status']],
+                'latitude': [lat],
+                'longitude': [lon],
+                'color': [VEHICLE_STATUS_RGBA['collecting']]
+            })
+            st.pydeck_chart(scatter_deck(
+                map_df, 'latitude', 'longitude',
+                "Vehicle: {vehicle_number}<br>Driver: {driver_name}<br>Status: {status}",
+                zoom=15, radius=30, extra_layers=[route_layer]
+            ))
         
         with col2:
             st.markdown("### 🚛 Vehicle Details")
@@ -1440,26 +1741,29 @@ def show_vehicle_tracking():
             st.markdown("### 📍 Location Update")
             
             with st.form("location_update"):
-                new_lat = st.number_input("Latitude", value=vehicle_info['current_latitude'], format="%.6f")
-                new_lon = st.number_input("Longitude", value=vehicle_info['current_longitude'], format="%.6f")
+                new_lat = st.number_input("Latitude", value=lat, format="%.6f")
+                new_lon = st.number_input("Longitude", value=lon, format="%.6f")
                 new_status = st.selectbox("Status", ["idle", "collecting", "in_transit", "maintenance"], 
                                         index=["idle", "collecting", "in_transit", "maintenance"].index(vehicle_info['status']))
                 
                 if st.form_submit_button("Update Location"):
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                        UPDATE vehicles 
-                        SET current_latitude = ?, current_longitude = ?, status = ?, last_updated = datetime('now')
-                        WHERE vehicle_number = ?
-                    ''', (new_lat, new_lon, new_status, selected_vehicle))
-                    conn.commit()
+                    conn = st.session_state.conn
+                    with conn:
+                        conn.execute('''
+                            UPDATE vehicles 
+                            SET current_latitude = ?, current_longitude = ?, status = ?, last_updated = datetime('now')
+                            WHERE vehicle_number = ?
+                        ''', (new_lat, new_lon, new_status, selected_vehicle))
+                    load_vehicles.clear()
                     st.success("Location updated!")
                     st.rerun()
 
 # ===================== ADDITIONAL UTILITY FUNCTIONS =====================
 def create_waste_heatmap():
     """Create a heatmap showing waste generation intensity across areas"""
-    waste_data = get_waste_data()
+    import plotly.express as px
+    
+    waste_data = get_waste_data(st.session_state.pool)
     
     # Group by location and calculate density
     location_data = waste_data.groupby(['latitude', 'longitude']).agg({
@@ -1481,17 +1785,21 @@ def create_waste_heatmap():
     
     return fig
 
-def create_efficiency_dashboard():
-    """Create efficiency metrics dashboard"""
-    waste_data = get_waste_data()
-    
-    # Calculate various efficiency metrics
-    total_collections = len(waste_data)
-    segregated_collections = waste_data['segregated'].sum()
-    segregation_rate = (segregated_collections / total_collections) * 100 if total_collections > 0 else 0
-    
-    processed_collections = len(waste_data[waste_data['status'] == 'processed'])
-    processing_rate = (processed_collections / total_collections) * 100 if total_collections > 0 else 0
+@st.cache_data(max_entries=4, show_spinner=False)
+def create_efficiency_dashboard(waste_data):
+    """Create efficiency metrics dashboard from the ``segregated_i8`` and ``status`` columns"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
+    # Calculate various efficiency metrics on the raw arrays (no filtered frame copies)
+    status = waste_data['status'].to_numpy()
+    segregated = waste_data['segregated_i8'].to_numpy()
+    total_collections = status.size
+    if total_collections:
+        segregation_rate = int(segregated.sum()) * 100 / total_collections
+        processing_rate = int((status == 'processed').sum()) * 100 / total_collections
+    else:
+        segregation_rate = processing_rate = 0
     
     # Create gauge charts
     fig = make_subplots(
@@ -1547,42 +1855,53 @@ def create_efficiency_dashboard():
     
     return fig
 
-def create_predictive_analysis():
-    """Create predictive analysis charts"""
-    waste_data = get_waste_data()
-    waste_data['collection_date'] = pd.to_datetime(waste_data['collection_date'])
-    
-    # Daily waste generation
-    daily_waste = waste_data.groupby(waste_data['collection_date'].dt.date)['weight_kg'].sum().reset_index()
-    daily_waste['collection_date'] = pd.to_datetime(daily_waste['collection_date'])
-    
-    # Simple trend prediction (linear)
-    from sklearn.linear_model import LinearRegression
-    import numpy as np
-    
-    X = np.arange(len(daily_waste)).reshape(-1, 1)
-    y = daily_waste['weight_kg'].values
-    
-    model = LinearRegression()
-    model.fit(X, y)
+@st.cache_data(max_entries=4, show_spinner=False)
+def _fit_trend(waste_data):
+    """Daily totals from ``collection_date``/``weight_kg`` plus a 7-day linear forecast"""
+    # Daily waste generation: bincount over integer day offsets, keeping only days that had collections
+    days = waste_data['collection_date'].to_numpy().astype('datetime64[D]')
+    weights = waste_data['weight_kg'].to_numpy(dtype=float, na_value=0.0)
+    valid = ~np.isnat(days)
+    days, weights = days[valid], weights[valid]
+    first_day = days.min() if days.size else np.datetime64('today', 'D')
+    offsets = (days - first_day).astype(np.int64)
+    daily_totals = np.bincount(offsets, weights=weights)
+    seen = np.bincount(offsets) > 0
+    dates = first_day + np.flatnonzero(seen)
+    daily_weights = daily_totals[seen]
+    
+    # Simple trend prediction (linear least squares; a single day gives a flat line, no days a zero line)
+    n = len(dates)
+    if n > 1:
+        slope, intercept = np.polyfit(np.arange(n), daily_weights, 1)
+    elif n == 1:
+        slope, intercept = 0.0, daily_weights[0]
+    else:
+        slope, intercept = 0.0, 0.0
     
     # Predict next 7 days
-    future_X = np.arange(len(daily_waste), len(daily_waste) + 7).reshape(-1, 1)
-    future_predictions = model.predict(future_X)
+    last_day = dates[-1] if n else first_day
+    future_dates = last_day + np.arange(1, 8, dtype='timedelta64[D]')
+    future_predictions = slope * np.arange(n, n + 7) + intercept
+    return dates, daily_weights, future_dates, future_predictions
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def create_predictive_analysis(dates, daily_weights, future_dates, future_predictions):
+    """Create predictive analysis charts from the output of ``_fit_trend``"""
+    import plotly.graph_objects as go
     
     # Create prediction chart
     fig = go.Figure()
     
-    fig.add_trace(go.Scatter(
-        x=daily_waste['collection_date'],
-        y=daily_waste['weight_kg'],
+    fig.add_trace(go.Scattergl(
+        x=dates,
+        y=daily_weights,
         mode='lines+markers',
         name='Historical Data',
         line=dict(color='blue')
     ))
     
-    future_dates = pd.date_range(start=daily_waste['collection_date'].max() + pd.Timedelta(days=1), periods=7)
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=future_dates,
         y=future_predictions,
         mode='lines+markers',
@@ -1600,152 +1919,206 @@ def create_predictive_analysis():
     return fig
 
 # ===================== ADVANCED 3D VISUALIZATIONS =====================
+# Plotly 3D scatters bog the browser down well before 10k markers
+MAX_3D_POINTS = 5000
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def create_flow_network(sources, sinks):
+    """Build the source-to-facility 3D flow network"""
+    import plotly.graph_objects as go
+    
+    # Coordinate arrays pulled out once and shared by the markers and the flow lines
+    sources = sources.to_numpy(dtype=float, na_value=np.nan)
+    sinks = sinks.to_numpy(dtype=float, na_value=np.nan)
+    
+    # Simulate waste flow network
+    fig = go.Figure(data=[
+        go.Scatter3d(
+            x=sources[:, 0],
+            y=sources[:, 1],
+            z=np.zeros(len(sources)),  # Source level
+            mode='markers',
+            marker=dict(
+                size=sources[:, 2] / 2,
+                color='blue',
+                opacity=0.6
+            ),
+            name='Waste Sources'
+        ),
+        go.Scatter3d(
+            x=sinks[:, 0],
+            y=sinks[:, 1],
+            z=np.full(len(sinks), 100),  # Facility level
+            mode='markers',
+            marker=dict(
+                size=sinks[:, 2] / 2,
+                color='green',
+                symbol='diamond',
+                opacity=0.8
+            ),
+            name='Facilities'
+        )
+    ])
+    
+    # Add flow lines (simplified): one trace, segments separated by NaN (null) gaps
+    n_flows = min(10, len(sources)) if len(sinks) else 0
+    if n_flows:
+        src = sources[:n_flows]
+        dst = sinks[np.arange(n_flows) % len(sinks)]
+        gap = np.full(n_flows, np.nan)
+        fig.add_trace(go.Scatter3d(
+            x=np.column_stack([src[:, 0], dst[:, 0], gap]).ravel().tolist(),
+            y=np.column_stack([src[:, 1], dst[:, 1], gap]).ravel().tolist(),
+            z=np.tile([0.0, 100.0, np.nan], n_flows).tolist(),
+            mode='lines',
+            line=dict(color='rgba(255,0,0,0.3)', width=2),
+            showlegend=False
+        ))
+    
+    fig.update_layout(
+        title="3D Waste Flow Network",
+        scene=dict(
+            xaxis_title="Longitude",
+            yaxis_title="Latitude", 
+            zaxis_title="Level",
+            bgcolor="rgba(0,0,0,0)"
+        ),
+        height=600
+    )
+    return fig
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def create_multidimensional_analysis(waste_data):
+    """Build the location + weight + segregation 3D scatter"""
+    import plotly.graph_objects as go
+    
+    # Sampled per segregation class so the mix is preserved
+    points = waste_data
+    title = "4D Waste Analysis (Location + Weight + Segregation)"
+    if len(points) > MAX_3D_POINTS:
+        points = points.groupby('segregated').sample(frac=MAX_3D_POINTS / len(points), random_state=0)
+        title += f" - {len(points):,} of {len(waste_data):,} collections"
+    
+    hover_text = ('Type: ' + points['waste_type'].astype(str)
+                  + '<br>Weight: ' + points['weight_kg'].astype(str)
+                  + 'kg<br>Ward: ' + points['ward_number'].astype(str))
+    
+    fig = go.Figure(data=go.Scatter3d(
+        x=points['longitude'],
+        y=points['latitude'],
+        z=points['weight_kg'],
+        mode='markers',
+        marker=dict(
+            size=8,
+            color=points['segregated_i8'],
+            colorscale=[[0, 'red'], [1, 'green']],
+            colorbar=dict(title="Segregated"),
+            opacity=0.7
+        ),
+        text=hover_text,
+        hovertemplate='%{text}<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        title=title,
+        scene=dict(
+            xaxis_title="Longitude",
+            yaxis_title="Latitude",
+            zaxis_title="Weight (kg)",
+            bgcolor="rgba(0,0,0,0)"
+        ),
+        height=600
+    )
+    return fig
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def create_density_volume(waste_data, bins=(40, 40, 20)):
+    """Bin collections into a (longitude, latitude, weight) grid and render it as a volume"""
+    import plotly.graph_objects as go
+    
+    # Browser cost depends on the grid size, not on the number of collections
+    coords = waste_data.to_numpy(dtype=float, na_value=np.nan)
+    coords = coords[~np.isnan(coords).any(axis=1)]
+    counts, edges = np.histogramdd(coords, bins=bins)
+    centers = [(e[:-1] + e[1:]) / 2 for e in edges]
+    x, y, z = np.meshgrid(*centers, indexing='ij')
+    
+    fig = go.Figure(data=go.Volume(
+        x=x.ravel(),
+        y=y.ravel(),
+        z=z.ravel(),
+        value=counts.ravel(),
+        isomin=1,
+        opacity=0.1,
+        surface_count=15,
+        colorscale='Viridis',
+        colorbar=dict(title="Collections")
+    ))
+    
+    fig.update_layout(
+        title=f"Collection Density (Location + Weight) - {len(coords):,} collections",
+        scene=dict(
+            xaxis_title="Longitude",
+            yaxis_title="Latitude",
+            zaxis_title="Weight (kg)",
+            bgcolor="rgba(0,0,0,0)"
+        ),
+        height=600
+    )
+    return fig
+
 def show_advanced_3d():
     """Show advanced 3D visualizations"""
     st.markdown('<h1 class="main-header">🎮 Advanced 3D Analytics</h1>', unsafe_allow_html=True)
     
-    tab1, tab2, tab3, tab4 = st.tabs(["🌐 Waste Flow", "📊 Multi-dimensional", "🔮 Predictions", "🎯 Efficiency"])
+    # One cached read per rerun, shared by every tab
+    waste_data = get_waste_data(st.session_state.pool)
+    facilities_data = get_facilities_data(st.session_state.pool)
     
-    with tab1:
+    # st.tabs would build all four 3D figures (and WebGL contexts) every rerun; only the chosen view renders here
+    views = ["🌐 Waste Flow", "📊 Multi-dimensional", "🔮 Predictions", "🎯 Efficiency"]
+    view = st.radio("View", views, horizontal=True, key="advanced_3d_view", label_visibility="collapsed")
+    
+    if view == views[0]:
         st.markdown("### 🌐 3D Waste Flow Visualization")
         
         # Create a 3D network showing waste flow from source to facility
-        waste_data = get_waste_data()
-        facilities_data = get_facilities_data()
-        
-        # Simulate waste flow network
-        fig = go.Figure(data=[
-            go.Scatter3d(
-                x=waste_data['longitude'][:50],  # Limit for performance
-                y=waste_data['latitude'][:50],
-                z=[0] * 50,  # Source level
-                mode='markers',
-                marker=dict(
-                    size=waste_data['weight_kg'][:50] / 2,
-                    color='blue',
-                    opacity=0.6
-                ),
-                name='Waste Sources'
-            ),
-            go.Scatter3d(
-                x=facilities_data['longitude'],
-                y=facilities_data['latitude'],
-                z=[100] * len(facilities_data),  # Facility level
-                mode='markers',
-                marker=dict(
-                    size=facilities_data['capacity_tpd'] / 2,
-                    color='green',
-                    symbol='diamond',
-                    opacity=0.8
-                ),
-                name='Facilities'
-            )
-        ])
-        
-        # Add flow lines (simplified)
-        for i in range(min(10, len(waste_data))):
-            nearest_facility = facilities_data.iloc[i % len(facilities_data)]
-            fig.add_trace(go.Scatter3d(
-                x=[waste_data.iloc[i]['longitude'], nearest_facility['longitude']],
-                y=[waste_data.iloc[i]['latitude'], nearest_facility['latitude']],
-                z=[0, 100],
-                mode='lines',
-                line=dict(color='rgba(255,0,0,0.3)', width=2),
-                showlegend=False
-            ))
-        
-        fig.update_layout(
-            title="3D Waste Flow Network",
-            scene=dict(
-                xaxis_title="Longitude",
-                yaxis_title="Latitude", 
-                zaxis_title="Level",
-                bgcolor="rgba(0,0,0,0)"
-            ),
-            height=600
+        fig = create_flow_network(
+            waste_data[['longitude', 'latitude', 'weight_kg']].head(50),  # Limit for performance
+            facilities_data[['longitude', 'latitude', 'capacity_tpd']]
         )
-        
         st.plotly_chart(fig, use_container_width=True)
     
-    with tab2:
+    elif view == views[1]:
         st.markdown("### 📊 Multi-dimensional Waste Analysis")
         
-        # Create 4D visualization (3D + color)
-        waste_data = get_waste_data()
-        
-        # Convert segregated values properly
-        def convert_segregated(x):
-            if isinstance(x, bytes):
-                return int.from_bytes(x, 'little')
-            elif isinstance(x, (int, float)):
-                return int(x)
-            else:
-                return 0
-        
-        segregated_values = waste_data['segregated'].apply(convert_segregated)
-        
-        fig = go.Figure(data=go.Scatter3d(
-            x=waste_data['longitude'],
-            y=waste_data['latitude'],
-            z=waste_data['weight_kg'],
-            mode='markers',
-            marker=dict(
-                size=8,
-                color=segregated_values,
-                colorscale=[[0, 'red'], [1, 'green']],
-                colorbar=dict(title="Segregated"),
-                opacity=0.7
-            ),
-            text=[f"Type: {row['waste_type']}<br>Weight: {row['weight_kg']}kg<br>Ward: {row['ward_number']}" 
-                  for _, row in waste_data.iterrows()],
-            hovertemplate='%{text}<extra></extra>'
-        ))
-        
-        fig.update_layout(
-            title="4D Waste Analysis (Location + Weight + Segregation)",
-            scene=dict(
-                xaxis_title="Longitude",
-                yaxis_title="Latitude",
-                zaxis_title="Weight (kg)",
-                bgcolor="rgba(0,0,0,0)"
-            ),
-            height=600
-        )
-        
+        # Large datasets render as a binned density volume; raw points stay available as a sampled scatter
+        if len(waste_data) > MAX_3D_POINTS and not st.checkbox("Show raw points", key="advanced_3d_raw_points"):
+            fig = create_density_volume(waste_data[['longitude', 'latitude', 'weight_kg']])
+        else:
+            # Create 4D visualization (3D + color)
+            fig = create_multidimensional_analysis(
+                waste_data[['longitude', 'latitude', 'weight_kg', 'segregated', 'segregated_i8', 'waste_type', 'ward_number']]
+            )
         st.plotly_chart(fig, use_container_width=True)
     
-    with tab3:
+    elif view == views[2]:
         st.markdown("### 🔮 Predictive 3D Modeling")
         
-        try:
-            fig = create_predictive_analysis()
-            st.plotly_chart(fig, use_container_width=True)
-            
-            st.markdown("### 📈 Prediction Insights")
-            st.markdown("- **Blue line**: Historical waste generation data")
-            st.markdown("- **Red dashed line**: Predicted values for next 7 days")
-            st.markdown("- Predictions based on linear trend analysis")
-            
-        except ImportError:
-            st.warning("Predictive analysis requires scikit-learn. Showing sample prediction visualization.")
-            
-            # Sample prediction visualization
-            dates = pd.date_range(start='2024-01-01', end='2024-01-31', freq='D')
-            actual = np.random.normal(100, 20, len(dates))
-            predicted = actual + np.random.normal(0, 5, len(dates))
-            
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=dates, y=actual, name='Actual', mode='lines'))
-            fig.add_trace(go.Scatter(x=dates, y=predicted, name='Predicted', mode='lines', line=dict(dash='dash')))
-            fig.update_layout(title="Sample Prediction Model", xaxis_title="Date", yaxis_title="Weight (kg)")
-            
-            st.plotly_chart(fig, use_container_width=True)
+        # Only the narrow frame is hashed for the fit; the figure is keyed on the small daily arrays
+        fig = create_predictive_analysis(*_fit_trend(waste_data[['collection_date', 'weight_kg']]))
+        st.plotly_chart(fig, use_container_width=True)
+        
+        st.markdown("### 📈 Prediction Insights")
+        st.markdown("- **Blue line**: Historical waste generation data")
+        st.markdown("- **Red dashed line**: Predicted values for next 7 days")
+        st.markdown("- Predictions based on linear trend analysis")
     
-    with tab4:
+    elif view == views[3]:
         st.markdown("### 🎯 Efficiency Dashboard")
         
         try:
-            fig = create_efficiency_dashboard()
+            fig = create_efficiency_dashboard(waste_data[['segregated_i8', 'status']])
             st.plotly_chart(fig, use_container_width=True)
             
             # Additional efficiency metrics
@@ -1796,7 +2169,7 @@ def show_3d_views():
 
 def show_dashboard():
     st.markdown('<h1 class="main-header">🏠 Dashboard</h1>', unsafe_allow_html=True)
-    stats = get_dashboard_stats()
+    stats = get_dashboard_stats(st.session_state.pool)
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.metric("Total Users", stats['total_users'], "👥")